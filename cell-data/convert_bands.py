@@ -1,34 +1,106 @@
 #!/usr/bin/env python3
-import json
 import re
+from functools import lru_cache
 from pathlib import Path
 
-src_path = Path("mcc-mnc.json")
-dst_path = Path("mcc-mnc-converted.json")
+import orjson
+
+BASE = Path(__file__).resolve().parent
+SRC_PATH = BASE / "mcc-mnc.json"
+DST_PATH = BASE / "mcc-mnc-converted.json"
 
 # Some CSVs include a BOM in the header, so keys can show up as "\\ufeffMCC"
 BOM_MCC_KEY = "\ufeffMCC"
 
+# Compiled once at import; normalize_bands runs per record so inline re.* calls
+# would pay the pattern-cache lookup on every token.
+_SPLIT_RE = re.compile(r"/|,|\+|\s+and\s+")
+
+# MHz -> 3GPP band number lookup tables, built once instead of per token.
+_LTE_FREQ_TO_BAND = {
+    700: "12",
+    800: "20",
+    850: "5",
+    900: "8",
+    1500: "32",
+    1700: "4",
+    1800: "3",
+    1900: "2",
+    2100: "1",
+    2600: "7",
+}
+
+_GSM_FREQ_TO_BAND = {
+    850: "5",
+    900: "8",
+    1800: "3",
+    1900: "2",
+}
+
+def _classify(p: str):
+    """Classify one upper-cased band token in a single left-to-right scan.
+
+    Returns (tech, num) where tech is "2G"/"3G"/"4G"/"5G" or None and num is
+    the first run of digits as an int (None if the token has no digits).
+    One linear pass replaces the separate NR/LTE/GSM/UMTS/WCDMA/HSPA
+    substring searches plus a regex digit search per token.
+    """
+    tech = None
+    num = None
+    i = 0
+    n = len(p)
+    while i < n:
+        c = p[i]
+        if "0" <= c <= "9":
+            if num is None:
+                d = 0
+                while i < n and "0" <= p[i] <= "9":
+                    d = d * 10 + (ord(p[i]) - 48)
+                    i += 1
+                num = d
+                continue
+        elif tech is None:
+            # Same priority as the old checks: "NR" anywhere or a leading "N"
+            # means 5G, otherwise the first recognized keyword wins.
+            if c == "N" and (i == 0 or p.startswith("NR", i)):
+                tech = "5G"
+            elif c == "L" and p.startswith("LTE", i):
+                tech = "4G"
+            elif c == "G" and p.startswith("GSM", i):
+                tech = "2G"
+            elif c == "U" and p.startswith("UMTS", i):
+                tech = "3G"
+            elif c == "W" and p.startswith("WCDMA", i):
+                tech = "3G"
+            elif c == "H" and p.startswith("HSPA", i):
+                tech = "3G"
+        i += 1
+    return tech, num
+
 def normalize_record_keys(rec: dict) -> dict:
-    out = dict(rec)
+    # Mutates rec in place and returns it; we own the parsed records, so
+    # there is no need to copy every dict just to rename a key.
 
     # Normalize MCC key (handle BOM) → always ensure we have a plain 'MCC'
-    if BOM_MCC_KEY in out and "MCC" not in out:
-        out["MCC"] = out.pop(BOM_MCC_KEY)
+    if BOM_MCC_KEY in rec and "MCC" not in rec:
+        rec["MCC"] = rec.pop(BOM_MCC_KEY)
 
     # Normalize Bands → keep original 'Bands' but also mirror into lowercase 'bands'
-    if "Bands" in out and "bands" not in out:
-        out["bands"] = out["Bands"]
-    elif "bands" in out and "Bands" not in out:
-        out["Bands"] = out["bands"]
+    if "Bands" in rec and "bands" not in rec:
+        rec["bands"] = rec["Bands"]
+    elif "bands" in rec and "Bands" not in rec:
+        rec["Bands"] = rec["bands"]
 
-    return out
+    return rec
 
+# Many MVNOs in one country share the exact same Bands string, so cache the
+# parse per distinct input. Callers treat the returned dict as read-only.
+@lru_cache(maxsize=4096)
 def normalize_bands(band_str: str):
     if not band_str:
         return {}
 
-    parts = re.split(r"/|,|\+|\s+and\s+", band_str)
+    parts = _SPLIT_RE.split(band_str)
     bands = {"2G": [], "3G": [], "4G": [], "5G": []}
 
     for p in parts:
@@ -36,79 +108,44 @@ def normalize_bands(band_str: str):
         if not p:
             continue
 
-        # 5G NR
-        if "NR" in p or p.startswith("N"):
-            m = re.search(r"(\\d+)", p)
-            if m:
-                bands["5G"].append(f"n{m.group(1)}")
-            continue
-
-        # LTE is 4G
-        if "LTE" in p:
-            m = re.search(r"(\\d+)", p)
-            if m:
-                mhz = int(m.group(1))
-                LTE_FREQ_TO_BAND = {
-                    700: "12",
-                    800: "20",
-                    850: "5",
-                    900: "8",
-                    1500: "32",
-                    1700: "4",
-                    1800: "3",
-                    1900: "2",
-                    2100: "1",
-                    2600: "7",
-                }
-                band = LTE_FREQ_TO_BAND.get(mhz, None)
-                if band:
-                    bands["4G"].append(f"B{band}")
-                else:
-                    bands["4G"].append(f"B{mhz}")
+        tech, mhz = _classify(p)
+        if tech is None or mhz is None:
             continue
 
-        # GSM is 2G
-        if "GSM" in p:
-            m = re.search(r"(\\d+)", p)
-            if m:
-                mhz = int(m.group(1))
-                GSM_FREQ_TO_BAND = {
-                    850: "5",
-                    900: "8",
-                    1800: "3",
-                    1900: "2",
-                }
-                band = GSM_FREQ_TO_BAND.get(mhz, None)
-                if band:
-                    bands["2G"].append(band)
-                else:
-                    bands["2G"].append(str(mhz))
-            continue
-
-        # UMTS/WCDMA is 3G
-        if "UMTS" in p or "WCDMA" in p or "HSPA" in p:
-            m = re.search(r"(\\d+)", p)
-            if m:
-                bands["3G"].append(m.group(1))
-            continue
+        if tech == "5G":
+            bands["5G"].append(f"n{mhz}")
+        elif tech == "4G":
+            band = _LTE_FREQ_TO_BAND.get(mhz, None)
+            bands["4G"].append(f"B{band}" if band else f"B{mhz}")
+        elif tech == "2G":
+            band = _GSM_FREQ_TO_BAND.get(mhz, None)
+            bands["2G"].append(band if band else str(mhz))
+        else:  # 3G (UMTS / WCDMA / HSPA)
+            bands["3G"].append(str(mhz))
 
     # Strip empty techs
     return {gen: arr for gen, arr in bands.items() if arr}
 
-with src_path.open("r", encoding="utf-8") as f:
-    raw = json.load(f)
+def main(rows=None, src_path=SRC_PATH, dst_path=DST_PATH):
+    # Accept already-parsed rows from update_mcc_mnc so the pipeline doesn't
+    # re-read the JSON it just wrote; standalone runs load from disk.
+    raw = rows if rows is not None else orjson.loads(src_path.read_bytes())
 
-out = []
+    out = []
 
-for rec in raw:
-    # Normalize keys (fix BOM + Bands/bands)
-    rec = normalize_record_keys(rec)
+    for rec in raw:
+        # Normalize keys (fix BOM + Bands/bands)
+        rec = normalize_record_keys(rec)
 
-    # Build structured bands from either 'bands' or 'Bands'
-    band_str = rec.get("bands") or rec.get("Bands") or ""
-    rec["bands_structured"] = normalize_bands(band_str)
+        # Build structured bands from either 'bands' or 'Bands'
+        band_str = rec.get("bands") or rec.get("Bands") or ""
+        rec["bands_structured"] = normalize_bands(band_str)
 
-    out.append(rec)
+        out.append(rec)
+
+    dst_path.write_bytes(orjson.dumps(out, option=orjson.OPT_INDENT_2))
+    print(f"Converted {len(out)} records \u2192 {dst_path}")
+    return out
 
-dst_path.write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
-print(f"Converted {len(out)} records \u2192 {dst_path}")
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,28 @@
 #!/usr/bin/env python3
 import json
 import os
+import re
 from pathlib import Path
 
 import psycopg2
+from psycopg2.extras import Json, execute_values
 
 BASE = Path(__file__).resolve().parent
 CONVERTED_PATH = BASE / "mcc-mnc-converted.json"
 
+# One C-level substitution instead of a per-character Python generator.
+_NOT_DIGIT_RE = re.compile(r"\D+")
+
 def digits(val):
     if val is None:
         return ""
-    return "".join(ch for ch in str(val) if ch.isdigit())
-
-def main():
-    if not CONVERTED_PATH.exists():
-        raise SystemExit(f"{CONVERTED_PATH} not found; run update_mcc_mnc.py first.")
-
-    data = json.loads(CONVERTED_PATH.read_text(encoding="utf-8"))
-    print(f"[sync_bands] Loaded {len(data)} converted rows from {CONVERTED_PATH.name}")
+    s = val if isinstance(val, str) else str(val)
+    # Values are almost always clean numeric strings; only fall back to the
+    # substitution when punctuation is present.
+    return s if s.isdigit() else _NOT_DIGIT_RE.sub("", s)
 
+def sync_bands(data):
+    """Push bands/bands_structured for already-converted records to Postgres."""
     db_params = {
         "host": os.environ.get("RTV_DB_HOST", "localhost"),
         "port": int(os.environ.get("RTV_DB_PORT", "5432")),
@@ -33,8 +36,8 @@ def main():
         conn.autocommit = False
         cur = conn.cursor()
 
-        updated = 0
-        missed = 0
+        rows = []
+        skipped = 0
 
         for r in data:
             mcc_s = digits(r.get("MCC") or r.get("mcc"))
@@ -42,43 +45,52 @@ def main():
             plmn_s = digits(r.get("PLMN") or r.get("plmn")) or None
 
             if not mcc_s or not mnc_s:
-                missed += 1
+                skipped += 1
                 continue
 
-            mcc_i = int(mcc_s)
-            mnc_i = int(mnc_s)
-
             bands_text = (r.get("bands") or r.get("Bands") or "").strip() or None
             bands_structured = r.get("bands_structured") or {}
 
-            if plmn_s:
-                cur.execute(
-                    '''
-                    UPDATE mcc_mnc_carriers
-                    SET bands = COALESCE(%s, bands),
-                        bands_structured = %s::jsonb
-                    WHERE mcc = %s AND mnc = %s AND plmn = %s
-                    ''',
-                    (bands_text, json.dumps(bands_structured), mcc_i, mnc_i, plmn_s),
-                )
-            else:
-                cur.execute(
-                    '''
-                    UPDATE mcc_mnc_carriers
-                    SET bands = COALESCE(%s, bands),
-                        bands_structured = %s::jsonb
-                    WHERE mcc = %s AND mnc = %s
-                    ''',
-                    (bands_text, json.dumps(bands_structured), mcc_i, mnc_i),
-                )
-
-            if cur.rowcount > 0:
-                updated += cur.rowcount
-            else:
-                missed += 1
+            rows.append((
+                int(mcc_s),
+                int(mnc_s),
+                plmn_s,
+                bands_text,
+                Json(bands_structured),
+            ))
+
+        # Stage everything in one round-trip, then update with a single
+        # set-oriented statement instead of one UPDATE per record.
+        cur.execute(
+            """
+            CREATE TEMP TABLE _bands_staging
+                (mcc int, mnc int, plmn text, bands text, bands_structured jsonb)
+            ON COMMIT DROP
+            """
+        )
+        execute_values(
+            cur,
+            "INSERT INTO _bands_staging VALUES %s",
+            rows,
+            template="(%s, %s, %s, %s, %s)",
+            page_size=1000,
+        )
+        cur.execute(
+            """
+            UPDATE mcc_mnc_carriers c
+            SET bands = COALESCE(b.bands, c.bands),
+                bands_structured = b.bands_structured
+            FROM _bands_staging b
+            WHERE c.mcc = b.mcc
+              AND c.mnc = b.mnc
+              AND (b.plmn IS NULL OR c.plmn = b.plmn)
+            """
+        )
+        updated = cur.rowcount
 
         conn.commit()
-        print(f"[sync_bands] Updated {updated} rows in mcc_mnc_carriers (missed {missed})")
+        print(f"[sync_bands] Updated {updated} rows in mcc_mnc_carriers "
+              f"(staged {len(rows)}, skipped {skipped} invalid)")
     except Exception as e:
         conn.rollback()
         print(f"[sync_bands] ERROR while syncing bands to Postgres: {e}")
@@ -86,5 +98,13 @@ def main():
     finally:
         conn.close()
 
+def main():
+    if not CONVERTED_PATH.exists():
+        raise SystemExit(f"{CONVERTED_PATH} not found; run update_mcc_mnc.py first.")
+
+    data = json.loads(CONVERTED_PATH.read_text(encoding="utf-8"))
+    print(f"[sync_bands] Loaded {len(data)} converted rows from {CONVERTED_PATH.name}")
+    sync_bands(data)
+
 if __name__ == "__main__":
     main()
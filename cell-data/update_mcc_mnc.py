@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 import csv
-import json
+import io
 import os
-import subprocess
-import sys
+import re
+import shutil
 import urllib.request
 from pathlib import Path
 
+import orjson
 import psycopg2
-from psycopg2.extras import execute_values
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+import convert_bands
+import sync_bands_to_db
 
 BASE = Path(__file__).resolve().parent
 
@@ -22,17 +28,27 @@ def download_csv():
     with urllib.request.urlopen(CSV_URL, timeout=30) as resp:
         if resp.status != 200:
             raise SystemExit(f"HTTP {resp.status} while fetching MCC/MNC table")
-        data = resp.read()
-    if not data:
+        # Stream to disk in 64KB chunks instead of buffering the whole
+        # payload into one bytes object.
+        with tmp_path.open("wb") as out:
+            shutil.copyfileobj(resp, out, 65536)
+    size = tmp_path.stat().st_size
+    if not size:
         raise SystemExit("Downloaded MCC/MNC CSV is empty, aborting")
-    tmp_path.write_bytes(data)
-    print(f"[mcc-mnc] Downloaded {len(data)} bytes to {tmp_path}")
+    print(f"[mcc-mnc] Downloaded {size} bytes to {tmp_path}")
     return tmp_path
 
+# Strips everything but digits in one C-level pass instead of a per-character
+# Python generator (this runs 3x per CSV record).
+_NOT_DIGIT_RE = re.compile(r"\D+")
+
 def _digits(val):
     if val is None:
         return ""
-    return "".join(ch for ch in str(val) if ch.isdigit())
+    s = val if isinstance(val, str) else str(val)
+    # MCC/MNC/PLMN are almost always clean numeric strings already; only
+    # fall back to the substitution when punctuation is present.
+    return s if s.isdigit() else _NOT_DIGIT_RE.sub("", s)
 
 def load_into_postgres(rows):
     print(f"[mcc-mnc] Loading {len(rows)} rows into Postgres...")
@@ -90,12 +106,20 @@ def load_into_postgres(rows):
         if not values:
             raise SystemExit("[mcc-mnc] No valid rows to insert into Postgres, aborting")
 
-        sql = """
-            INSERT INTO mcc_mnc_carriers
+        # COPY is Postgres's native bulk path: one stream, no per-row
+        # INSERT parsing. csv.writer leaves None cells unquoted-empty,
+        # which CSV-format COPY reads back as NULL.
+        buf = io.StringIO()
+        csv.writer(buf).writerows(values)
+        buf.seek(0)
+        cur.copy_expert(
+            """
+            COPY mcc_mnc_carriers
                 (mcc, mnc, plmn, region, country, iso, operator, brand, tadig, bands)
-            VALUES %s
-        """
-        execute_values(cur, sql, values)
+            FROM STDIN WITH (FORMAT csv)
+            """,
+            buf,
+        )
         conn.commit()
         print("[mcc-mnc] Postgres load complete")
     except Exception as e:
@@ -105,50 +129,53 @@ def load_into_postgres(rows):
     finally:
         conn.close()
 
+# Columns we expect from mcc-mnc.net; kept as strings and trimmed after parse.
+# The first header cell may carry a BOM, so list that variant too.
+_CSV_STR_FIELDS = ("MCC", "MNC", "PLMN", "Region", "Country", "ISO",
+                   "Operator", "Brand", "TADIG", "Bands", "﻿MCC")
+
 def csv_to_json(csv_path, json_path):
     print(f"[mcc-mnc] Converting {csv_path.name} -> {json_path.name}")
-    with csv_path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        rows = [dict(row) for row in reader]
+    # Arrow's C engine parses the table in one pass; pin the known columns
+    # to string so MCC/MNC/PLMN don't get inferred as integers.
+    table = pa_csv.read_csv(
+        csv_path,
+        parse_options=pa_csv.ParseOptions(delimiter=";"),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in _CSV_STR_FIELDS}
+        ),
+    )
+    # Vectorized whitespace trim per column instead of a per-field Python loop.
+    for i, name in enumerate(table.column_names):
+        if name in _CSV_STR_FIELDS and pa.types.is_string(table.column(name).type):
+            table = table.set_column(
+                i, name, pc.utf8_trim_whitespace(table.column(name))
+            )
+    rows = table.to_pylist()
     if not rows:
         raise SystemExit("[mcc-mnc] Parsed 0 rows from CSV, aborting")
 
-    for r in rows:
-        for key in ("MCC", "MNC", "PLMN", "Region", "Country", "ISO",
-                    "Operator", "Brand", "TADIG", "Bands"):
-            if key in r and isinstance(r[key], str):
-                r[key] = r[key].strip()
-
-    json_path.write_text(
-        json.dumps(rows, indent=2, ensure_ascii=False),
-        encoding="utf-8"
-    )
+    json_path.write_bytes(orjson.dumps(rows, option=orjson.OPT_INDENT_2))
     print(f"[mcc-mnc] Wrote JSON with {len(rows)} records to {json_path}")
-    load_into_postgres(rows)
+    return rows
 
-def run_convert_bands():
-    script = BASE / "convert_bands.py"
-    if not script.exists():
-        print(f"[mcc-mnc] WARNING: {script} not found, skipping band conversion")
-        return
-
-    print(f"[mcc-mnc] Running {script.name} ...")
-    result = subprocess.run(
-        [sys.executable, str(script)],
-        cwd=str(BASE),
-        check=False,
-    )
-    if result.returncode != 0:
-        raise SystemExit(f"[mcc-mnc] convert_bands.py exited with {result.returncode}")
-    print("[mcc-mnc] Band conversion complete (mcc-mnc-converted.json should be updated)")
+def run_convert_bands(rows):
+    # Same codebase, so call it in-process and hand over the parsed rows
+    # instead of forking an interpreter that re-reads mcc-mnc.json.
+    print("[mcc-mnc] Running band conversion ...")
+    converted = convert_bands.main(rows)
+    print("[mcc-mnc] Band conversion complete (mcc-mnc-converted.json updated)")
+    return converted
 
 def main():
     tmp_csv = download_csv()
     tmp_csv.replace(CSV_PATH)
     print(f"[mcc-mnc] Updated {CSV_PATH}")
 
-    csv_to_json(CSV_PATH, JSON_PATH)
-    run_convert_bands()
+    rows = csv_to_json(CSV_PATH, JSON_PATH)
+    load_into_postgres(rows)
+    converted = run_convert_bands(rows)
+    sync_bands_to_db.sync_bands(converted)
     print("[mcc-mnc] Update pipeline finished successfully")
 
 if __name__ == "__main__":
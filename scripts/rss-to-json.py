@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
+import io
 import sys
 import json
 import html
 from datetime import datetime
 from html.parser import HTMLParser
 from urllib import request, error
-import xml.etree.ElementTree as ET
+
+from lxml import etree
 
 
 class MLStripper(HTMLParser):
@@ -19,13 +21,46 @@ class MLStripper(HTMLParser):
     def get_data(self):
         return "".join(self._buf)
 
+    def reset_buf(self):
+        # Make the instance reusable: clear our buffer and the parser state.
+        self._buf.clear()
+        self.reset()
+
 
-def strip_tags(text):
+def strip_tags(text, stripper=None):
     if not text:
         return ""
-    s = MLStripper()
-    s.feed(text)
-    return s.get_data()
+    # Most descriptions are plain text; skip the HTMLParser state machine
+    # entirely when there is nothing to strip.
+    if "<" not in text:
+        return text
+    if stripper is None:
+        stripper = MLStripper()
+    else:
+        stripper.reset_buf()
+    stripper.feed(text)
+    return stripper.get_data()
+
+
+def _unescape_if(s: str) -> str:
+    # html.unescape walks the entity tables even for plain text; only call
+    # it when an ampersand is actually present.
+    return html.unescape(s) if s and "&" in s else s
+
+
+def _dedupe_summary(title: str, summary: str) -> str:
+    """
+    Return "" when the summary is just the title repeated, optionally
+    followed by a short separator tail. Both arguments must already be
+    stripped; the tail slice is only computed when the prefix matches.
+    """
+    if summary == title:
+        return ""
+    if summary.startswith(title):
+        tail = summary[len(title):].lstrip(" -–:•\u00a0")
+        if len(tail) <= 60:
+            return ""
+    return summary
 
 
 def clean_google_title(title: str) -> str:
@@ -49,89 +84,99 @@ def fetch_xml(url: str) -> bytes:
         return resp.read()
 
 
-def find_first_text(node: ET.Element, suffixes):
-    """
-    Find first non-empty text in any descendant whose tag ends with one of suffixes.
-    suffixes should be lowercase, like ['title', 'description'].
-    """
-    for e in node.iter():
-        tag = e.tag
-        if not isinstance(tag, str):
-            continue
-        low = tag.lower()
-        if any(low.endswith(suf) for suf in suffixes):
-            txt = (e.text or "").strip()
-            if txt:
-                return txt
-    return ""
+# Namespace-stripped element names harvested by _index_item.
+_WANTED = {
+    "title", "description", "summary", "encoded", "content",
+    "pubdate", "published", "updated", "date", "source", "link",
+}
 
 
-def extract_link(node: ET.Element) -> str:
-    # Try Atom-style <link href="...">
-    for e in node.iter():
+def _index_item(item):
+    """
+    Collect every field we care about in one walk over the item subtree.
+
+    Returns (fields, link_href): fields maps a namespace-stripped lowercase
+    tag name to its first non-empty text; link_href is the first Atom-style
+    <link href="..."> value. One pass replaces the five separate .iter()
+    scans previously done per item.
+    """
+    fields = {}
+    link_href = ""
+    for e in item.iter():
         tag = e.tag
         if not isinstance(tag, str):
             continue
-        low = tag.lower()
-        if low.endswith("link"):
+        low = tag.rsplit("}", 1)[-1].lower()
+        if low == "link" and not link_href:
             href = e.attrib.get("href")
             if href:
-                return href.strip()
-    # Fallback: RSS-style <link>text</link>
-    txt = find_first_text(node, ["link"])
-    return txt
+                link_href = href.strip()
+        if low in _WANTED and low not in fields:
+            txt = (e.text or "").strip()
+            if txt:
+                fields[low] = txt
+    return fields, link_href
 
 
 def parse_feed(xml_bytes: bytes, default_source_name: str, limit: int, is_google_url: bool):
-    root = ET.fromstring(xml_bytes)
+    articles = []
 
-    # Prefer RSS <item>, else Atom <entry>
-    items = root.findall(".//item")
-    if not items:
-        items = root.findall(".//{*}entry")
+    # One tag stripper reused across every title/summary in the feed, and
+    # the default source name unescaped once rather than per article.
+    stripper = MLStripper()
+    default_name = _unescape_if(default_source_name)
 
-    articles = []
+    # Stream RSS <item> / Atom <entry> elements as they close instead of
+    # materializing the whole DOM; lxml's C parser does the tokenizing.
+    for _event, item in etree.iterparse(io.BytesIO(xml_bytes), events=("end",)):
+        tag = item.tag
+        if not isinstance(tag, str) or not tag.lower().endswith(("item", "entry")):
+            continue
 
-    for item in items[:limit]:
-        raw_title = find_first_text(item, ["title"])
-        title = (raw_title or "").strip()
+        fields, link_href = _index_item(item)
 
-        link = extract_link(item)
+        title = fields.get("title", "").strip()
+
+        # Atom-style <link href="...">, else RSS-style <link>text</link>
+        link = link_href or fields.get("link", "")
 
         # Description / summary content
-        raw_summary = find_first_text(
-            item, ["description", "summary", "encoded", "content"]
+        raw_summary = (
+            fields.get("description")
+            or fields.get("summary")
+            or fields.get("encoded")
+            or fields.get("content")
+            or ""
         )
-        summary = strip_tags(raw_summary).strip()
+        summary = strip_tags(raw_summary, stripper).strip()
 
         # Published / updated
-        published = find_first_text(
-            item, ["pubdate", "published", "updated", "dc:date"]
+        published = (
+            fields.get("pubdate")
+            or fields.get("published")
+            or fields.get("updated")
+            or fields.get("date")
+            or ""
         )
 
         # Try to get per-article source name (Google News, etc.)
-        per_article_source = strip_tags(find_first_text(item, ["source"])) or ""
-        src_name = per_article_source.strip() or default_source_name
+        per_article_source = strip_tags(fields.get("source", ""), stripper) or ""
+        src_name = per_article_source.strip()
 
         # Google News cleanup on the title
         if is_google_url or "news.google.com" in (link or ""):
             title = clean_google_title(title)
 
         # Unescape HTML entities
-        title = html.unescape(title)
-        summary = html.unescape(summary)
-        src_name = html.unescape(src_name)
+        title = _unescape_if(title)
+        summary = _unescape_if(summary)
+        src_name = _unescape_if(src_name) or default_name
 
         # Drop summary if it's basically just the title repeated
-        norm_title = (title or "").strip()
-        norm_summary = (summary or "").strip()
-        if norm_title and norm_summary:
-            if norm_summary == norm_title:
-                summary = ""
-            elif norm_summary.startswith(norm_title):
-                tail = norm_summary[len(norm_title):].lstrip(" -–:•\u00a0")
-                if len(tail) <= 60:
-                    summary = ""
+        norm_title = title.strip()
+        norm_summary = summary.strip()
+        if norm_title and norm_summary and not _dedupe_summary(norm_title, norm_summary):
+            summary = ""
 
         article = {
             "source": {"id": None, "name": src_name},
@@ -145,6 +190,14 @@ def parse_feed(xml_bytes: bytes, default_source_name: str, limit: int, is_google
         }
         articles.append(article)
 
+        # Free the processed subtree so memory stays bounded on long feeds.
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+
+        if len(articles) >= limit:
+            break
+
     return articles
 
 
@@ -1,11 +1,58 @@
 #!/usr/bin/env python3
+import csv
+import hashlib
+import io
+import threading
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from requests.adapters import HTTPAdapter, Retry
+from requests_cache import CachedSession
 import psycopg2
 
 DB_DSN = "dbname=russelltv user=rtv host=192.168.99.38"
 N2YO_BASE = "http://127.0.0.1/api/n2yo"
 
+# TLE fetch concurrency: 8 workers, globally throttled to 10 requests/s so
+# we stay polite to the N2YO proxy without a fixed 0.5s sleep per request.
+FETCH_WORKERS = 8
+
+# Stored TLEs younger than this are not re-fetched; a daily refresh still
+# lands well inside the window.
+TLE_REFRESH = timedelta(hours=6)
+
+
+class _RateLimiter:
+    """Token-bucket limiter: at most `calls` acquisitions per `period` seconds."""
+
+    def __init__(self, calls: int, period: float):
+        self._interval = period / calls
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(self._next, now) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+_TLE_LIMITER = _RateLimiter(calls=10, period=1.0)
+
+# One session shared by all fetch workers: keep-alive connections instead of
+# a fresh TCP handshake per TLE, plus retries on transient proxy errors.
+# TLEs only change about once a day, so responses are cached locally for an
+# hour — steady-state re-runs barely touch the proxy at all.
+SESSION = CachedSession("n2yo_cache", expire_after=3600, allowable_methods=["GET"])
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+))
+
 # Curated SATCOM set (mil + commercial you'd actually plan on)
 SATELLITES = {'wgs': {'constellation': 'wgs',
          'role': 'milsatcom',
@@ -133,120 +180,239 @@ SATELLITES = {'wgs': {'constellation': 'wgs',
                          {'norad_id': 41729, 'name': 'JCSAT-16'},
                          {'norad_id': 39500, 'name': 'Thaicom 6'}]}}
 
+def _dedupe_sats(rows):
+    """Collapse duplicate norad_ids so each satellite is fetched and upserted
+    exactly once. Last entry wins — the same outcome the old per-row upsert
+    loop produced silently — but we warn so the curated dict can be fixed.
+    Hand-maintained IDs are validated here too, at import, rather than
+    failing halfway through a run."""
+    unique = {}
+    for row in rows:
+        if not isinstance(row[0], int) or row[0] <= 0:
+            raise ValueError(f"bad norad_id {row[0]!r} for {row[1]!r} in SATELLITES")
+        if not row[1]:
+            raise ValueError(f"missing name for norad_id {row[0]} in SATELLITES")
+        if row[0] in unique:
+            print(f"[WARN] norad_id {row[0]} listed more than once "
+                  f"({unique[row[0]][1]!r} and {row[1]!r}); keeping the later entry")
+        unique[row[0]] = row
+    return tuple(unique.values())
+
+
+# Flat (norad_id, name, operator, constellation, role, band, orbit_type)
+# rows, computed once at import instead of re-walking the nested dicts and
+# re-reading the per-constellation metadata for every satellite.
+FLAT_SATS = _dedupe_sats(
+    (sat["norad_id"], sat["name"], meta["operator"], meta["constellation"],
+     meta["role"], meta["band"], meta["orbit_type"])
+    for meta in SATELLITES.values()
+    for sat in meta["satellites"]
+)
+
+
 def get_tle(norad_id: int):
     """Fetch TLE via your N2YO proxy. Handles both JSON and raw text."""
     url = f"{N2YO_BASE}/tle/{norad_id}"
+    _TLE_LIMITER.acquire()
     try:
-        resp = requests.get(url, timeout=15)
+        resp = SESSION.get(url, timeout=15)
         resp.raise_for_status()
     except Exception as e:
         print(f"[WARN] TLE request failed for {norad_id}: {e}")
         return None, None
 
-    tle1 = tle2 = None
-
-    # Try JSON first
-    try:
+    # Branch on the declared content type instead of letting resp.json()
+    # raise ValueError as control flow for plain-text payloads.
+    ct = resp.headers.get("content-type", "").lower()
+    if "json" in ct:
         data = resp.json()
-        # N2YO format: usually a 'tle' field with multi-line text
-        if isinstance(data, dict) and "tle" in data:
-            raw = data["tle"]
-        else:
-            # If API proxy exposes 'line1' / 'line2'
+        if isinstance(data, dict):
+            # If API proxy exposes 'line1' / 'line2', short-circuit the
+            # common case before the multi-line split path
             line1 = data.get("line1") or data.get("tle1")
             line2 = data.get("line2") or data.get("tle2")
             if line1 and line2:
                 return line1.strip(), line2.strip()
+            # N2YO format: usually a 'tle' field with multi-line text
+            raw = data.get("tle")
+        else:
             raw = None
-    except ValueError:
-        # Not JSON, assume plain text TLE
+    else:
+        # Plain text TLE
         raw = resp.text
 
     if not raw:
         print(f"[WARN] No TLE payload for {norad_id}")
         return None, None
 
-    # Split out last two non-empty lines as TLE1 / TLE2
-    lines = [ln.strip() for ln in str(raw).splitlines() if ln.strip()]
-    if len(lines) >= 2:
-        tle1, tle2 = lines[-2], lines[-1]
-    else:
-        print(f"[WARN] Could not parse TLE lines for {norad_id}")
-        return None, None
+    # A TLE payload always ends with the two element lines, so take the
+    # tail directly instead of building a list of every line.
+    tail = str(raw).rstrip().rsplit("\n", 2)
+    if len(tail) >= 2:
+        tle1, tle2 = tail[-2].strip(), tail[-1].strip()
+        if tle1 and tle2:
+            return tle1, tle2
 
-    return tle1, tle2
+    print(f"[WARN] Could not parse TLE lines for {norad_id}")
+    return None, None
+
+
+class _IterReader:
+    """Minimal file-like object feeding copy_expert from an iterator of
+    strings, so the COPY payload is never materialized in one buffer."""
+
+    def __init__(self, lines):
+        self._it = iter(lines)
+        self._tail = ""
+
+    def read(self, n=-1):
+        chunks = [self._tail]
+        size = len(self._tail)
+        while n < 0 or size < n:
+            try:
+                chunk = next(self._it)
+            except StopIteration:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        data = "".join(chunks)
+        if 0 <= n < len(data):
+            self._tail = data[n:]
+            return data[:n]
+        self._tail = ""
+        return data
+
+
+def _csv_lines(rows):
+    # One reusable buffer; csv.writer handles quoting per row.
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(row)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+
+def _copy_into_temp(cur, name, ddl_cols, rows):
+    """COPY rows into a fresh temp table; Postgres's native bulk-ingest path.
+    Rows are serialized lazily, keeping memory flat however large the batch."""
+    cur.execute(f"CREATE TEMP TABLE {name} ({ddl_cols}) ON COMMIT DROP")
+    cur.copy_expert(
+        f"COPY {name} FROM STDIN WITH (FORMAT csv)",
+        _IterReader(_csv_lines(rows)),
+    )
 
 
 def main():
+    catalog_rows = list(FLAT_SATS)
+
     conn = psycopg2.connect(DB_DSN)
-    conn.autocommit = False
-    cur = conn.cursor()
+    try:
+        # Transaction 1 (read-only): current TLE state. Rows updated within
+        # the refresh window are not fetched at all, and stale ones are
+        # diffed against the fetched payload before writing.
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT norad_id, tle1, tle2, last_updated FROM sat_tle")
+                now_utc = datetime.now(timezone.utc)
+                current = {}
+                fresh = set()
+                for nid, t1, t2, lu in cur.fetchall():
+                    current[nid] = (t1, t2)
+                    if lu is not None:
+                        lu_utc = lu if lu.tzinfo else lu.replace(tzinfo=timezone.utc)
+                        if now_utc - lu_utc < TLE_REFRESH:
+                            fresh.add(nid)
 
-    total = 0
-    updated = 0
+        # Fetch only stale TLEs, concurrently, with no transaction open.
+        to_fetch = [row[0] for row in catalog_rows if row[0] not in fresh]
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            results = list(pool.map(get_tle, to_fetch))
 
-    try:
-        for const_key, meta in SATELLITES.items():
-            constellation = meta["constellation"]
-            role = meta["role"]
-            band = meta["band"]
-            orbit_type = meta["orbit_type"]
-            operator = meta["operator"]
-
-            for sat in meta["satellites"]:
-                norad_id = sat["norad_id"]
-                name = sat["name"]
-                total += 1
-
-                # Upsert basic catalog info
-                cur.execute(
-                    """
-                    INSERT INTO sat_catalog
-                        (norad_id, name, operator, constellation, role, band, orbit_type, source)
-                    VALUES
-                        (%s, %s, %s, %s, %s, %s, %s, 'n2yo-daily')
-                    ON CONFLICT (norad_id) DO UPDATE
-                    SET name          = EXCLUDED.name,
-                        operator      = EXCLUDED.operator,
-                        constellation = EXCLUDED.constellation,
-                        role          = EXCLUDED.role,
-                        band          = EXCLUDED.band,
-                        orbit_type    = EXCLUDED.orbit_type,
-                        source        = EXCLUDED.source,
-                        last_updated  = now();
-                    """
-                    ,
-                    (norad_id, name, operator, constellation, role, band, orbit_type),
-                )
-
-                # Fetch and upsert TLE
-                tle1, tle2 = get_tle(norad_id)
-                if tle1 and tle2:
+        tle_rows = [
+            (norad_id, tle1, tle2)
+            for norad_id, (tle1, tle2) in zip(to_fetch, results)
+            if tle1 and tle2
+        ]
+
+        # Drop rows whose TLE matches what's already stored so the upsert
+        # only touches satellites with genuinely new elements.
+        unchanged = sum(1 for r in tle_rows if current.get(r[0]) == (r[1], r[2]))
+        tle_rows = [r for r in tle_rows if current.get(r[0]) != (r[1], r[2])]
+
+        # Transaction 2: catalog upsert. The rows derive entirely from the
+        # in-source SATELLITES dict, so this only runs when that dict
+        # changed since the last recorded run.
+        catalog_hash = hashlib.blake2b(
+            repr(catalog_rows).encode(), digest_size=16
+        ).hexdigest()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("CREATE TABLE IF NOT EXISTS sat_catalog_meta (hash text)")
+                cur.execute("SELECT hash FROM sat_catalog_meta")
+                meta = cur.fetchone()
+                catalog_written = not meta or meta[0] != catalog_hash
+
+                if catalog_written:
+                    # COPY the batch into a temp table, then merge with one
+                    # set-oriented upsert.
+                    _copy_into_temp(
+                        cur, "_cat",
+                        "norad_id int, name text, operator text, constellation text, "
+                        "role text, band text, orbit_type text",
+                        catalog_rows,
+                    )
                     cur.execute(
                         """
-                        INSERT INTO sat_tle (norad_id, tle1, tle2)
-                        VALUES (%s, %s, %s)
+                        INSERT INTO sat_catalog
+                            (norad_id, name, operator, constellation, role, band, orbit_type, source)
+                        SELECT norad_id, name, operator, constellation, role, band, orbit_type, 'n2yo-daily'
+                        FROM _cat
                         ON CONFLICT (norad_id) DO UPDATE
-                        SET tle1 = EXCLUDED.tle1,
-                            tle2 = EXCLUDED.tle2,
-                            last_updated = now();
+                        SET name          = EXCLUDED.name,
+                            operator      = EXCLUDED.operator,
+                            constellation = EXCLUDED.constellation,
+                            role          = EXCLUDED.role,
+                            band          = EXCLUDED.band,
+                            orbit_type    = EXCLUDED.orbit_type,
+                            source        = EXCLUDED.source,
+                            last_updated  = now();
                         """
-                        ,
-                        (norad_id, tle1, tle2),
                     )
-                    updated += 1
+                    cur.execute("DELETE FROM sat_catalog_meta")
+                    cur.execute("INSERT INTO sat_catalog_meta (hash) VALUES (%s)", (catalog_hash,))
 
-                # Be nice to N2YO / your proxy
-                time.sleep(0.5)
+        # Transaction 3: TLE merge.
+        if tle_rows:
+            with conn:
+                with conn.cursor() as cur:
+                    _copy_into_temp(
+                        cur, "_tle",
+                        "norad_id int, tle1 text, tle2 text",
+                        tle_rows,
+                    )
+                    # Set-oriented MERGE (PG15+) instead of INSERT ... ON
+                    # CONFLICT: one plan, one pass over the staged rows.
+                    cur.execute(
+                        """
+                        MERGE INTO sat_tle t
+                        USING _tle s ON t.norad_id = s.norad_id
+                        WHEN MATCHED THEN
+                            UPDATE SET tle1 = s.tle1,
+                                       tle2 = s.tle2,
+                                       last_updated = now()
+                        WHEN NOT MATCHED THEN
+                            INSERT (norad_id, tle1, tle2)
+                            VALUES (s.norad_id, s.tle1, s.tle2);
+                        """
+                    )
 
-        conn.commit()
-        print(f"[INFO] Processed {total} satellites, TLE updated for {updated}.")
-    except Exception as e:
-        conn.rollback()
-        print(f"[ERROR] Rolling back due to: {e}")
-        raise
+        print(f"[INFO] Processed {len(catalog_rows)} satellites "
+              f"(catalog {'written' if catalog_written else 'unchanged, skipped'}), "
+              f"fetched {len(to_fetch)} ({len(fresh)} still fresh), "
+              f"TLE updated for {len(tle_rows)} (unchanged {unchanged}).")
     finally:
-        cur.close()
         conn.close()
 
 